@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipes.models import Ingredient, Tag
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def catalog_version():
+    """Текущая версия кеша справочников тегов и ингредиентов."""
+    return cache.get_or_set(CATALOG_VERSION_KEY, 1, None)
+
+
+def catalog_etag(request, *args, **kwargs):
+    """ETag списков каталога — меняется вместе с версией кеша."""
+    return '"catalog-{}"'.format(catalog_version())
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_catalog_version(sender, **kwargs):
+    """Сдвигает версию кеша при изменении справочников.
+
+    Старые ключи просто перестают читаться и доживают до своего TTL —
+    адресной чистки не требуется.
+    """
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 1, None)
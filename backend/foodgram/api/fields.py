@@ -0,0 +1,60 @@
+import base64
+import binascii
+import hashlib
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+
+ALLOWED_IMAGE_FORMATS = ('png', 'jpeg', 'jpg', 'gif', 'webp')
+
+
+class Base64ImageField(serializers.ImageField):
+    """Изображение строкой вида data:image/<fmt>;base64,<данные>.
+
+    Формат берётся из MIME-префикса по белому списку, без повторного
+    чтения декодированного буфера (imghdr устарел и дублирует работу);
+    validate=True отбрасывает повреждённый base64 за один проход.
+    Тело после ';base64,' не вырезается в отдельную строку — декодер
+    получает memoryview исходных байтов, что вдвое снижает пиковую
+    память на больших картинках.
+
+    Файл именуется SHA-256 содержимого, поэтому повторная загрузка
+    той же картинки (обычное дело при редактировании из SPA) не плодит
+    копии: при заданном dedup_dir уже лежащий в хранилище файл
+    переиспользуется без записи.
+    """
+
+    def __init__(self, dedup_dir=None, **kwargs):
+        self.dedup_dir = dedup_dir
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith('data:'):
+            idx = data.find(';base64,')
+            if idx == -1:
+                raise serializers.ValidationError(
+                    'Некорректные base64-данные.')
+            img_format = data[5:idx].rsplit('/', 1)[-1].lower()
+            if img_format not in ALLOWED_IMAGE_FORMATS:
+                raise serializers.ValidationError(
+                    'Неподдерживаемый формат изображения.')
+            try:
+                raw = data.encode('latin-1')
+                decoded = base64.b64decode(
+                    memoryview(raw)[idx + len(';base64,'):], validate=True)
+            except (UnicodeEncodeError, binascii.Error, ValueError):
+                raise serializers.ValidationError(
+                    'Некорректные base64-данные.')
+            file_name = '{}.{}'.format(
+                hashlib.sha256(decoded).hexdigest(), img_format)
+            if self.dedup_dir is not None:
+                existing = posixpath.join(self.dedup_dir, file_name)
+                if default_storage.exists(existing):
+                    return existing
+            data = ContentFile(decoded, name=file_name)
+        elif isinstance(data, str) and data.startswith('http'):
+            raise SkipField()
+        return super().to_internal_value(data)
@@ -1,5 +1,36 @@
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 
 
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор с быстрой оценкой count через pg_class.reltuples.
+
+    Точный SELECT COUNT(*) выполняется только для отфильтрованных
+    выборок и небольших таблиц, где оценка планировщика ненадёжна.
+    """
+
+    estimate_threshold = 1000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if (query is not None and not query.where
+                and connection.vendor == 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE relname = %s',
+                    [self.object_list.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row is not None and row[0] >= self.estimate_threshold:
+                return row[0]
+        return super().count
+
+
 class CustomPaginator(PageNumberPagination):
+    django_paginator_class = EstimatedCountPaginator
     page_size_query_param = 'limit'
+    max_page_size = 100
@@ -0,0 +1,20 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+
+
+class ORJSONRenderer(BaseRenderer):
+    """JSON-рендерер на orjson.
+
+    Кодирование словарей в JSON на C заметно быстрее стандартного
+    json.dumps на списочных ручках; default=str покрывает нестандартные
+    типы (Decimal, lazy-строки и т.п.).
+    """
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=str)
@@ -1,15 +1,87 @@
+import copy
+
 from django.contrib.auth.password_validation import validate_password
 from django.core import exceptions as django_exceptions
+from django.core.files.storage import default_storage
 from django.db import transaction
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_base64.fields import Base64ImageField
-from recipes.models import (Favorite, Ingredient, Recipe, Recipe_ingredient,
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             Shopping_cart, Tag)
 from rest_framework import serializers
 from users.models import Subscribe, User
 
-
-class UserReadSerializer(UserSerializer):
+from foodgram.settings import BULK_CREATE_BATCH_SIZE
+
+from .fields import Base64ImageField
+
+
+def subscribed_author_ids(context):
+    """Множество author_id подписок текущего пользователя.
+
+    Считается одним запросом при первом обращении и мемоизируется в
+    контексте сериализатора, так что повторные проверки is_subscribed
+    в пределах запроса не ходят в базу.
+    """
+    request = context.get('request')
+    if request is None or request.user.is_anonymous:
+        return frozenset()
+    subscribed_ids = context.get('_subscribed_ids')
+    if subscribed_ids is None:
+        subscribed_ids = set(Subscribe.objects.filter(
+            user=request.user).values_list('author_id', flat=True))
+        context['_subscribed_ids'] = subscribed_ids
+    return subscribed_ids
+
+
+def recipe_short_dicts(recipes, request=None):
+    """Проекция рецептов в формат RecipeSerializer без DRF-машинерии.
+
+    Для плоских списков из четырёх полей привязка полей и
+    to_representation на каждую строку не нужны — values_list()
+    и литералы словарей дают тот же ответ заметно дешевле.
+    Принимает queryset либо уже загруженные объекты Recipe
+    (например, из prefetch_related); с переданным request ссылки на
+    картинки абсолютные, как у остальных image-полей API.
+    """
+    if isinstance(recipes, QuerySet) and recipes._result_cache is None:
+        rows = recipes.values_list('id', 'name', 'image', 'cooking_time')
+    else:
+        rows = ((recipe.pk, recipe.name, recipe.image.name,
+                 recipe.cooking_time) for recipe in recipes)
+    result = []
+    for pk, name, image, cooking_time in rows:
+        url = default_storage.url(image) if image else None
+        if url is not None and request is not None:
+            url = request.build_absolute_uri(url)
+        result.append({
+            'id': pk,
+            'name': name,
+            'image': url,
+            'cooking_time': cooking_time,
+        })
+    return result
+
+
+class CachedFieldsMixin:
+    """Кеширует результат get_fields() на уровне класса сериализатора.
+
+    DRF строит словарь полей через deepcopy при каждом инстанцировании;
+    набор полей зависит только от класса, поэтому шаблон считается один
+    раз, а инстансы получают дешёвые поверхностные копии для bind().
+    """
+
+    _fields_cache = {}
+
+    def get_fields(self):
+        cls = type(self)
+        fields = self._fields_cache.get(cls)
+        if fields is None:
+            fields = self._fields_cache[cls] = super().get_fields()
+        return {name: copy.copy(field) for name, field in fields.items()}
+
+
+class UserReadSerializer(CachedFieldsMixin, UserSerializer):
     """[GET] Cписок пользователей."""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -24,12 +96,7 @@ class UserReadSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request and not request.user.is_anonymous:
-            return Subscribe.objects.filter(
-                user=request.user, author=obj
-            ).exists()
-        return False
+        return obj.pk in subscribed_author_ids(self.context)
 
 
 class UserCreateSerializer(UserCreateSerializer):
@@ -57,7 +124,9 @@ class UserCreateSerializer(UserCreateSerializer):
 
 
 class AvatarSerializer(serializers.Serializer):
-    avatar = Base64ImageField(required=True)
+    avatar = Base64ImageField(
+        required=True,
+        dedup_dir=User._meta.get_field('image').upload_to)
 
     def update(self, instance, validated_data):
         instance.image = validated_data.get('avatar')
@@ -98,7 +167,7 @@ class SetPasswordSerializer(serializers.Serializer):
         return validated_data
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """Список рецептов без ингридиентов."""
 
     image = Base64ImageField(read_only=True)
@@ -111,7 +180,8 @@ class RecipeSerializer(serializers.ModelSerializer):
                   'image', 'cooking_time')
 
 
-class SubscriptionsSerializer(serializers.ModelSerializer):
+class SubscriptionsSerializer(CachedFieldsMixin,
+                              serializers.ModelSerializer):
     """[GET] Список авторов на которых подписан пользователь."""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -131,13 +201,11 @@ class SubscriptionsSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        return (
-            self.context.get('request').user.is_authenticated
-            and Subscribe.objects.filter(user=self.context['request'].user,
-                                         author=obj).exists()
-        )
+        return obj.pk in subscribed_author_ids(self.context)
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.count()
 
     def get_recipes(self, obj):
@@ -146,17 +214,17 @@ class SubscriptionsSerializer(serializers.ModelSerializer):
         recipes = obj.recipes.all()
         if limit:
             recipes = recipes[:int(limit)]
-        serializer = RecipeSerializer(recipes, many=True, read_only=True)
-        return serializer.data
+        return recipe_short_dicts(recipes, request)
 
 
-class SubscribeAuthorSerializer(serializers.ModelSerializer):
+class SubscribeAuthorSerializer(CachedFieldsMixin,
+                                serializers.ModelSerializer):
     """[POST, DELETE] Подписка на автора и отписка."""
 
     email = serializers.ReadOnlyField()
     username = serializers.ReadOnlyField()
     is_subscribed = serializers.SerializerMethodField()
-    recipes = RecipeSerializer(many=True, read_only=True)
+    recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
     image = Base64ImageField(read_only=True)
 
@@ -176,17 +244,18 @@ class SubscribeAuthorSerializer(serializers.ModelSerializer):
         return obj
 
     def get_is_subscribed(self, obj):
-        return (
-            self.context.get('request').user.is_authenticated
-            and Subscribe.objects.filter(user=self.context['request'].user,
-                                         author=obj).exists()
-        )
+        return obj.pk in subscribed_author_ids(self.context)
+
+    def get_recipes(self, obj):
+        return recipe_short_dicts(obj.recipes.all(),
+                                  self.context.get('request'))
 
     def get_recipes_count(self, obj):
         return obj.recipes.count()
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(CachedFieldsMixin,
+                           serializers.ModelSerializer):
     """[GET] Список ингредиентов."""
 
     class Meta:
@@ -194,7 +263,7 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """[GET] Список тегов."""
 
     class Meta:
@@ -202,7 +271,8 @@ class TagSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class RecipeIngredientSerializer(serializers.ModelSerializer):
+class RecipeIngredientSerializer(CachedFieldsMixin,
+                                 serializers.ModelSerializer):
     """Список ингредиентов с количеством для рецепта."""
 
     id = serializers.ReadOnlyField(source='ingredient.id')
@@ -211,12 +281,13 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         source='ingredient.measurement_unit')
 
     class Meta:
-        model = Recipe_ingredient
+        model = RecipeIngredient
         fields = ('id', 'name',
                   'measurement_unit', 'amount')
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(CachedFieldsMixin,
+                           serializers.ModelSerializer):
     """[GET] Список рецептов."""
 
     author = UserReadSerializer(read_only=True)
@@ -236,40 +307,44 @@ class RecipeReadSerializer(serializers.ModelSerializer):
                   'text', 'cooking_time')
 
     def get_is_favorited(self, obj):
-        return (
-            self.context.get('request').user.is_authenticated
-            and Favorite.objects.filter(user=self.context['request'].user,
-                                        recipe=obj).exists()
-        )
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        user = self.context.get('request').user
+        if not user.is_authenticated:
+            return False
+        favorite_ids = self.context.get('_favorite_ids')
+        if favorite_ids is None:
+            favorite_ids = set(Favorite.objects.filter(
+                user=user).values_list('recipe_id', flat=True))
+            self.context['_favorite_ids'] = favorite_ids
+        return obj.pk in favorite_ids
 
     def get_is_in_shopping_cart(self, obj):
-        return (
-            self.context.get('request').user.is_authenticated
-            and Shopping_cart.objects.filter(
-                user=self.context['request'].user,
-                recipe=obj).exists()
-        )
-
-
-class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
-    """Ингредиент и количество для создания рецепта."""
-
-    id = serializers.IntegerField()
-
-    class Meta:
-        model = Recipe_ingredient
-        fields = ('id', 'amount')
-
-
-class RecipeCreateSerializer(serializers.ModelSerializer):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        user = self.context.get('request').user
+        if not user.is_authenticated:
+            return False
+        cart_ids = self.context.get('_shopping_cart_ids')
+        if cart_ids is None:
+            cart_ids = set(Shopping_cart.objects.filter(
+                user=user).values_list('recipe_id', flat=True))
+            self.context['_shopping_cart_ids'] = cart_ids
+        return obj.pk in cart_ids
+
+
+class RecipeCreateSerializer(CachedFieldsMixin,
+                             serializers.ModelSerializer):
     """[POST, PATCH, DELETE] Создание, изменение и удаление рецепта."""
 
     tags = serializers.PrimaryKeyRelatedField(many=True,
                                               queryset=Tag.objects.all())
     author = UserReadSerializer(read_only=True)
     id = serializers.ReadOnlyField()
-    ingredients = RecipeIngredientCreateSerializer(many=True)
-    image = Base64ImageField()
+    ingredients = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False)
+    image = Base64ImageField(
+        dedup_dir=Recipe._meta.get_field('image').upload_to)
 
     class Meta:
         model = Recipe
@@ -300,24 +375,68 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Нужно указать минимум 1 ингредиент.'
             )
-        inrgedient_id_list = [item['id'] for item in obj.get('ingredients')]
-        unique_ingredient_id_list = set(inrgedient_id_list)
-        if len(inrgedient_id_list) != len(unique_ingredient_id_list):
-            raise serializers.ValidationError(
-                'Ингредиенты должны быть уникальны.'
-            )
         return obj
 
+    def validate_ingredients(self, value):
+        seen_ids = set()
+        normalized = []
+        for item in value:
+            try:
+                ingredient_id = int(item['id'])
+                amount = int(item['amount'])
+            except (KeyError, TypeError, ValueError):
+                raise serializers.ValidationError(
+                    'Укажите id и amount для каждого ингредиента.'
+                )
+            if amount < 1:
+                raise serializers.ValidationError(
+                    'Количество должно быть не меньше 1.'
+                )
+            if ingredient_id in seen_ids:
+                raise serializers.ValidationError(
+                    'Ингредиенты должны быть уникальны.'
+                )
+            seen_ids.add(ingredient_id)
+            normalized.append({'id': ingredient_id, 'amount': amount})
+        return normalized
+
     @transaction.atomic
     def tags_and_ingredients_set(self, recipe, tags, ingredients):
         recipe.tags.set(tags)
-        Recipe_ingredient.objects.bulk_create(
-            [Recipe_ingredient(
+        ingredient_ids = [item['id'] for item in ingredients]
+        existing_ids = set(Ingredient.objects.filter(
+            id__in=ingredient_ids).values_list('id', flat=True))
+        missing_ids = set(ingredient_ids) - existing_ids
+        if missing_ids:
+            raise serializers.ValidationError(
+                f'Несуществующие ингредиенты: {sorted(missing_ids)}.'
+            )
+        incoming = {item['id']: item['amount'] for item in ingredients}
+        current = {row.ingredient_id: row for row in recipe.recipes.all()}
+        removed_ids = current.keys() - incoming.keys()
+        if removed_ids:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed_ids).delete()
+        RecipeIngredient.objects.bulk_create(
+            [RecipeIngredient(
                 recipe=recipe,
-                ingredient=Ingredient.objects.get(pk=ingredient['id']),
-                amount=ingredient['amount']
-            ) for ingredient in ingredients]
+                ingredient_id=ingredient_id,
+                amount=amount
+            ) for ingredient_id, amount in incoming.items()
+                if ingredient_id not in current],
+            batch_size=BULK_CREATE_BATCH_SIZE
         )
+        changed_rows = []
+        for ingredient_id, amount in incoming.items():
+            row = current.get(ingredient_id)
+            if row is not None and row.amount != amount:
+                row.amount = amount
+                changed_rows.append(row)
+        if changed_rows:
+            RecipeIngredient.objects.bulk_update(
+                changed_rows, ['amount'],
+                batch_size=BULK_CREATE_BATCH_SIZE
+            )
 
     @transaction.atomic
     def create(self, validated_data):
@@ -337,13 +456,20 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'cooking_time', instance.cooking_time)
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
-        Recipe_ingredient.objects.filter(
-            recipe=instance,
-            ingredient__in=instance.ingredients.all()).delete()
         self.tags_and_ingredients_set(instance, tags, ingredients)
         instance.save()
         return instance
 
     def to_representation(self, instance):
-        return RecipeReadSerializer(instance,
-                                    context=self.context).data
+        read_serializer = self.context.get('_recipe_read_serializer')
+        if read_serializer is None:
+            read_serializer = RecipeReadSerializer(context=self.context)
+            self.context['_recipe_read_serializer'] = read_serializer
+        prefetch_related_objects(
+            [instance],
+            'tags',
+            Prefetch('recipes',
+                     queryset=RecipeIngredient.objects.select_related(
+                         'ingredient')),
+        )
+        return read_serializer.to_representation(instance)
@@ -13,4 +13,5 @@ router.register(
 urlpatterns = [
     path('', include(router.urls)),
     path(r'auth/', include('djoser.urls.authtoken')),
+    path(r'auth/', include('djoser.urls.jwt')),
 ]
@@ -1,8 +1,14 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import (BooleanField, Count, Exists, OuterRef, Prefetch,
+                              Sum, Value)
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django_filters.rest_framework import DjangoFilterBackend
-from recipes.models import (Favorite, Ingredient, Recipe, Recipe_ingredient,
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             Shopping_cart, Tag)
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
@@ -10,8 +16,9 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from users.models import Subscribe, User
 
-from foodgram.settings import FILE_NAME
+from foodgram.settings import CATALOG_CACHE_TIMEOUT, FILE_NAME
 
+from .cache import catalog_etag, catalog_version
 from .filters import RecipeFilter
 from .pagination import CustomPaginator
 from .permissions import IsAuthorOrReadOnly
@@ -43,14 +50,21 @@ class UserViewSet(mixins.CreateModelMixin,
             request.user, data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response({'detail': 'Пароль изменен успешно.'},
-                        status=status.HTTP_204_NO_CONTENT)
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['get'],
             permission_classes=(IsAuthenticated,),
             pagination_class=CustomPaginator)
     def subscriptions(self, request):
-        queryset = User.objects.filter(subscribing__user=request.user)
+        queryset = (
+            User.objects.filter(subscribing__user=request.user)
+            .annotate(recipes_count=Count('recipes'))
+            .prefetch_related(Prefetch(
+                'recipes',
+                queryset=Recipe.objects.only(
+                    'id', 'author', 'name', 'image', 'cooking_time')))
+            .order_by('id')
+        )
         page = self.paginate_queryset(queryset)
         serializer = SubscriptionsSerializer(page, many=True,
                                              context={'request': request})
@@ -65,15 +79,19 @@ class UserViewSet(mixins.CreateModelMixin,
             serializer = SubscribeAuthorSerializer(
                 author, data=request.data, context={"request": request})
             serializer.is_valid(raise_exception=True)
-            Subscribe.objects.create(user=request.user, author=author)
+            try:
+                with transaction.atomic():
+                    Subscribe.objects.create(user=request.user, author=author)
+            except IntegrityError:
+                return Response({'errors': 'Вы уже подписаны на автора.'},
+                                status=status.HTTP_400_BAD_REQUEST)
             return Response(serializer.data,
                             status=status.HTTP_201_CREATED)
 
         if request.method == 'DELETE':
             get_object_or_404(Subscribe, user=request.user,
                               author=author).delete()
-            return Response({'detail': 'Успешная отписка'},
-                            status=status.HTTP_204_NO_CONTENT)
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['put'], url_path='me/avatar',
             permission_classes=(IsAuthenticated,))
@@ -81,16 +99,16 @@ class UserViewSet(mixins.CreateModelMixin,
         serializer = AvatarSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.update(request.user, serializer.validated_data)
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['delete'], url_path='me/avatar',
             permission_classes=(IsAuthenticated,))
     def delete_avatar(self, request):
-        if request.user.image:
-            request.user.image.delete(save=False)
+        # Файл в хранилище не трогаем: имена строятся по SHA-256
+        # содержимого, и тот же файл могут разделять другие аватары.
         request.user.image = None
         request.user.save(update_fields=['image'])
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
 
 class IngredientViewSet(mixins.ListModelMixin,
@@ -103,6 +121,20 @@ class IngredientViewSet(mixins.ListModelMixin,
     filter_backends = (filters.SearchFilter, )
     search_fields = ('^name', )
 
+    @method_decorator(condition(etag_func=catalog_etag))
+    def list(self, request, *args, **kwargs):
+        cache_key = 'catalog:ingredients:{}:{}'.format(
+            catalog_version(), request.META.get('QUERY_STRING', ''))
+        data = cache.get(cache_key)
+        if data is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            data = list(queryset.values('id', 'name', 'measurement_unit'))
+            cache.set(cache_key, data, CATALOG_CACHE_TIMEOUT)
+        response = Response(data)
+        patch_cache_control(response, public=True,
+                            max_age=CATALOG_CACHE_TIMEOUT)
+        return response
+
 
 class TagViewSet(mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
@@ -112,6 +144,18 @@ class TagViewSet(mixins.ListModelMixin,
     serializer_class = TagSerializer
     pagination_class = None
 
+    @method_decorator(condition(etag_func=catalog_etag))
+    def list(self, request, *args, **kwargs):
+        cache_key = f'catalog:tags:{catalog_version()}'
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.get_serializer(self.get_queryset(), many=True).data
+            cache.set(cache_key, data, CATALOG_CACHE_TIMEOUT)
+        response = Response(data)
+        patch_cache_control(response, public=True,
+                            max_age=CATALOG_CACHE_TIMEOUT)
+        return response
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
@@ -120,6 +164,36 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filterset_class = RecipeFilter
     permission_classes = (IsAuthorOrReadOnly, )
 
+    def get_queryset(self):
+        user = self.request.user
+        queryset = (
+            Recipe.objects
+            .select_related('author')
+            .prefetch_related(
+                'tags',
+                Prefetch('recipes',
+                         queryset=RecipeIngredient.objects
+                         .select_related('ingredient')
+                         .only('recipe', 'amount', 'ingredient__name',
+                               'ingredient__measurement_unit')))
+            .only('name', 'text', 'cooking_time', 'image',
+                  'author__email', 'author__username', 'author__first_name',
+                  'author__last_name', 'author__image')
+        )
+        if user.is_authenticated:
+            return queryset.annotate(
+                is_favorited=Exists(
+                    Favorite.objects.filter(user=user,
+                                            recipe=OuterRef('pk'))),
+                is_in_shopping_cart=Exists(
+                    Shopping_cart.objects.filter(user=user,
+                                                 recipe=OuterRef('pk'))),
+            )
+        return queryset.annotate(
+            is_favorited=Value(False, output_field=BooleanField()),
+            is_in_shopping_cart=Value(False, output_field=BooleanField()),
+        )
+
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH'):
             return RecipeCreateSerializer
@@ -136,21 +210,19 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer = RecipeSerializer(recipe, data=request.data,
                                           context={"request": request})
             serializer.is_valid(raise_exception=True)
-            if not Favorite.objects.filter(user=request.user,
-                                           recipe=recipe).exists():
-                Favorite.objects.create(user=request.user, recipe=recipe)
-                return Response(serializer.data,
-                                status=status.HTTP_201_CREATED)
-            return Response({'errors': 'Рецепт уже в избранном.'},
-                            status=status.HTTP_400_BAD_REQUEST)
+            try:
+                with transaction.atomic():
+                    Favorite.objects.create(user=request.user, recipe=recipe)
+            except IntegrityError:
+                return Response({'errors': 'Рецепт уже в избранном.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            return Response(serializer.data,
+                            status=status.HTTP_201_CREATED)
 
         if request.method == 'DELETE':
             get_object_or_404(Favorite, user=request.user,
                               recipe=recipe).delete()
-            return Response(
-                {'detail': 'Рецепт успешно удален из избранного.'},
-                status=status.HTTP_204_NO_CONTENT
-            )
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['post', 'delete'],
             permission_classes=(IsAuthenticated,))
@@ -161,21 +233,20 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer = RecipeSerializer(recipe, data=request.data,
                                           context={"request": request})
             serializer.is_valid(raise_exception=True)
-            if not Shopping_cart.objects.filter(user=request.user,
-                                                recipe=recipe).exists():
-                Shopping_cart.objects.create(user=request.user, recipe=recipe)
-                return Response(serializer.data,
-                                status=status.HTTP_201_CREATED)
-            return Response({'errors': 'Рецепт уже в списке покупок.'},
-                            status=status.HTTP_400_BAD_REQUEST)
+            try:
+                with transaction.atomic():
+                    Shopping_cart.objects.create(user=request.user,
+                                                 recipe=recipe)
+            except IntegrityError:
+                return Response({'errors': 'Рецепт уже в списке покупок.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            return Response(serializer.data,
+                            status=status.HTTP_201_CREATED)
 
         if request.method == 'DELETE':
             get_object_or_404(Shopping_cart, user=request.user,
                               recipe=recipe).delete()
-            return Response(
-                {'detail': 'Рецепт успешно удален из списка покупок.'},
-                status=status.HTTP_204_NO_CONTENT
-            )
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['get'], permission_classes=(AllowAny,),
             url_path='get-link')
@@ -188,17 +259,21 @@ class RecipeViewSet(viewsets.ModelViewSet):
             permission_classes=(IsAuthenticated,))
     def download_shopping_cart(self, request, **kwargs):
         ingredients = (
-            Recipe_ingredient.objects
+            RecipeIngredient.objects
             .filter(recipe__shopping_recipe__user=request.user)
             .values('ingredient')
             .annotate(total_amount=Sum('amount'))
+            .order_by('ingredient__name')
             .values_list('ingredient__name', 'total_amount',
                          'ingredient__measurement_unit')
         )
-        file_list = []
-        [file_list.append(
-            '{} - {} {}.'.format(*ingredient)) for ingredient in ingredients]
-        file = HttpResponse('Cписок покупок:\n' + '\n'.join(file_list),
-                            content_type='text/plain')
+
+        def file_lines():
+            yield 'Cписок покупок:'
+            for ingredient in ingredients.iterator(chunk_size=500):
+                yield '\n{} - {} {}.'.format(*ingredient)
+
+        file = StreamingHttpResponse(file_lines(),
+                                     content_type='text/plain')
         file['Content-Disposition'] = (f'attachment; filename={FILE_NAME}')
         return file
@@ -10,7 +10,12 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
 application = get_asgi_application()
+
+# Прогрев URL-резолвера при старте воркера, чтобы компиляция паттернов
+# и словаря reverse() не попадала в первый запрос после форка.
+get_resolver()._populate()
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 
 from . import models
 
@@ -29,27 +30,35 @@ class RecipeAdmin(admin.ModelAdmin):
         'author__email',
     )
     list_filter = ('name', 'author', 'tags')
+    list_select_related = ('author', )
     readonly_fields = ('in_favorites',)
     empty_value_display = '-пусто-'
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            'tags').annotate(favorites_count=Count('favorite_recipe'))
+
     @admin.display(description='В избранном')
     def in_favorites(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorites_count
 
 
-@admin.register(models.Recipe_ingredient)
+@admin.register(models.RecipeIngredient)
 class RecipeIngredientAdmin(admin.ModelAdmin):
     list_display = ('pk', 'recipe', 'ingredient', 'amount')
     list_editable = ('recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
 
 
 @admin.register(models.Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'recipe')
     list_editable = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
 
 
 @admin.register(models.Shopping_cart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'recipe')
     list_editable = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
@@ -1,33 +1,47 @@
 import csv
+import io
 import os
 
 from django.core.management.base import BaseCommand
-from progress.bar import IncrementalBar
+from django.db import connection, transaction
 from recipes.models import Ingredient
 
 from foodgram import settings
 
 
-def ingredient_create(row):
-    Ingredient.objects.get_or_create(
-        name=row[0],
-        measurement_unit=row[1]
-    )
-
-
 class Command(BaseCommand):
     help = "Load ingredients to DB"
 
+    @transaction.atomic
     def handle(self, *args, **options):
         path = os.path.join(settings.BASE_DIR, 'ingredients.csv')
-        with open(path, 'r', encoding='utf-8') as file:
-            row_count = sum(1 for row in file)
         with open(path, 'r', encoding='utf-8') as file:
             reader = csv.reader(file)
-            bar = IncrementalBar('ingredients.csv'.ljust(17), max=row_count)
             next(reader)
-            for row in reader:
-                bar.next()
-                ingredient_create(row)
-            bar.finish()
+            rows = dict.fromkeys(
+                (row[0], row[1]) for row in reader if len(row) >= 2)
+        existing = set(
+            Ingredient.objects.values_list('name', 'measurement_unit'))
+        new_rows = [row for row in rows if row not in existing]
+        if not new_rows:
+            self.stdout.write("[!] The ingredients are already loaded.")
+            return
+        if connection.vendor == 'postgresql':
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(new_rows)
+            buffer.seek(0)
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL synchronous_commit = OFF')
+                cursor.copy_expert(
+                    'COPY {} (name, measurement_unit) '
+                    'FROM STDIN WITH (FORMAT csv)'.format(
+                        Ingredient._meta.db_table),
+                    buffer
+                )
+        else:
+            Ingredient.objects.bulk_create(
+                [Ingredient(name=name, measurement_unit=unit)
+                 for name, unit in new_rows],
+                batch_size=settings.BULK_CREATE_BATCH_SIZE
+            )
         self.stdout.write("[!] The ingredients has been loaded successfully.")
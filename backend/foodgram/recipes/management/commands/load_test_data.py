@@ -1,69 +1,106 @@
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from recipes.models import Ingredient, Recipe, Recipe_ingredient, Tag
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
 from users.models import User
 
+from foodgram.settings import BULK_CREATE_BATCH_SIZE
+
 
 class Command(BaseCommand):
     help = "Load test users and recipes into the database"
 
     @transaction.atomic
     def handle(self, *args, **options):
-        users_data = [
-            {
+        users_data = {
+            'testuser1': {
                 'username': 'testuser1',
                 'email': 'test1@example.com',
                 'first_name': 'Тест',
                 'last_name': 'Пользователь 1',
             },
-            {
+            'testuser2': {
                 'username': 'testuser2',
                 'email': 'test2@example.com',
                 'first_name': 'Тест',
                 'last_name': 'Пользователь 2',
             },
-        ]
-        created_users = []
-        for data in users_data:
-            user, created = User.objects.get_or_create(
-                username=data['username'], defaults=data
+        }
+        existing_users = User.objects.filter(
+            username__in=users_data).in_bulk(field_name='username')
+        password = make_password('testpassword')
+        User.objects.bulk_create(
+            [User(password=password, **data)
+             for username, data in users_data.items()
+             if username not in existing_users],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+        changed_users = []
+        for username, user in existing_users.items():
+            changed = False
+            for field, value in users_data[username].items():
+                if getattr(user, field) != value:
+                    setattr(user, field, value)
+                    changed = True
+            if changed:
+                changed_users.append(user)
+        if changed_users:
+            User.objects.bulk_update(
+                changed_users,
+                ['email', 'first_name', 'last_name'],
+                batch_size=BULK_CREATE_BATCH_SIZE
             )
-            if created:
-                user.set_password('testpassword')
-                user.save()
-                created_users.append(user)
-            else:
-                changed = False
-                for field, value in data.items():
-                    if getattr(user, field) != value:
-                        setattr(user, field, value)
-                        changed = True
-                if changed:
-                    user.save()
-        tag, _ = Tag.objects.get_or_create(
-            name='Завтрак',
-            defaults={'slug': 'breakfast', 'color': '#00FF00'}
+        tags_data = {
+            'breakfast': Tag(name='Завтрак',
+                             slug='breakfast',
+                             color='#00FF00'),
+        }
+        existing_slugs = set(Tag.objects.filter(
+            slug__in=tags_data).values_list('slug', flat=True))
+        Tag.objects.bulk_create(
+            [tag for slug, tag in tags_data.items()
+             if slug not in existing_slugs],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+            ignore_conflicts=True
         )
-        ingredient, _ = Ingredient.objects.get_or_create(
-            name='Соль',
-            defaults={'measurement_unit': 'г'}
+        ingredients_data = {
+            'Соль': Ingredient(name='Соль', measurement_unit='г'),
+        }
+        existing_names = set(Ingredient.objects.filter(
+            name__in=ingredients_data).values_list('name', flat=True))
+        Ingredient.objects.bulk_create(
+            [ingredient for name, ingredient in ingredients_data.items()
+             if name not in existing_names],
+            batch_size=BULK_CREATE_BATCH_SIZE
         )
         author = User.objects.get(username='testuser1')
-        recipe, created = Recipe.objects.get_or_create(
-            name='Тестовый рецепт',
-            defaults={
-                'text': 'Это тестовый рецепт для демонстрации',
-                'cooking_time': 10,
-                'author': author,
-            },
-        )
-        if created:
-            Recipe_ingredient.objects.create(
-                recipe=recipe,
-                ingredient=ingredient,
-                amount=1
+        recipes_data = {
+            'Тестовый рецепт': Recipe(
+                name='Тестовый рецепт',
+                text='Это тестовый рецепт для демонстрации',
+                cooking_time=10,
+                author=author,
+            ),
+        }
+        existing_recipes = set(Recipe.objects.filter(
+            name__in=recipes_data).values_list('name', flat=True))
+        new_recipes = [recipe for name, recipe in recipes_data.items()
+                       if name not in existing_recipes]
+        Recipe.objects.bulk_create(new_recipes,
+                                   batch_size=BULK_CREATE_BATCH_SIZE)
+        if new_recipes:
+            tag = Tag.objects.get(slug='breakfast')
+            ingredient = Ingredient.objects.get(name='Соль')
+            RecipeIngredient.objects.bulk_create(
+                [RecipeIngredient(recipe=recipe,
+                                  ingredient=ingredient,
+                                  amount=1) for recipe in new_recipes],
+                batch_size=BULK_CREATE_BATCH_SIZE,
+                ignore_conflicts=True
             )
-            recipe.tags.add(tag)
+            for recipe in new_recipes:
+                recipe.tags.add(tag)
         self.stdout.write(
             self.style.SUCCESS('Test data created successfully.')
         )
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.16 on 2026-08-30 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['recipe', 'user'], name='recipes_fav_recipe__ff3971_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date'], name='recipes_rec_pub_dat_cd8af6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipes_rec_author__a19ae0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shopping_cart',
+            index=models.Index(fields=['recipe', 'user'], name='recipes_sho_recipe__c838d1_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.16 on 2026-08-30 12:02
+
+from django.db import migrations, models
+
+
+def add_name_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_upper_prefix '
+        'ON recipes_ingredient (UPPER(name) varchar_pattern_ops)'
+    )
+
+
+def drop_name_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'DROP INDEX IF EXISTS recipes_ingredient_name_upper_prefix'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredient',
+            name='name',
+            field=models.CharField(db_index=True, max_length=200, verbose_name='Название'),
+        ),
+        migrations.RunPython(add_name_prefix_index, drop_name_prefix_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-08-30 13:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_ingredient_name_index'),
+    ]
+
+    operations = [
+        migrations.RenameModel(
+            old_name='Recipe_ingredient',
+            new_name='RecipeIngredient',
+        ),
+    ]
@@ -6,7 +6,8 @@ from users.models import User
 class Ingredient(models.Model):
     name = models.CharField(
         'Название',
-        max_length=200
+        max_length=200,
+        db_index=True
     )
     measurement_unit = models.CharField(
         'Единица измерения',
@@ -83,7 +84,7 @@ class Recipe(models.Model):
     )
     ingredients = models.ManyToManyField(
         Ingredient,
-        through='Recipe_ingredient',
+        through='RecipeIngredient',
         through_fields=('recipe', 'ingredient'),
         verbose_name='Ингредиенты'
     )
@@ -96,12 +97,16 @@ class Recipe(models.Model):
         ordering = ['-pub_date']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=['-pub_date']),
+            models.Index(fields=['author', '-pub_date']),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Recipe_ingredient(models.Model):
+class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
@@ -153,6 +158,9 @@ class Favorite(models.Model):
     class Meta:
         verbose_name = 'Избранное'
         verbose_name_plural = 'Избранное'
+        indexes = [
+            models.Index(fields=['recipe', 'user']),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'recipe'],
@@ -181,6 +189,9 @@ class Shopping_cart(models.Model):
     class Meta:
         verbose_name = 'Корзина'
         verbose_name_plural = 'Корзина'
+        indexes = [
+            models.Index(fields=['recipe', 'user']),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'recipe'],
@@ -18,4 +18,5 @@ class UserAdmin(admin.ModelAdmin):
 class SubscribeAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'author')
     list_editable = ('user', 'author')
+    list_select_related = ('user', 'author')
     empty_value_display = '-пусто-'
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.16 on 2026-08-30 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='users/', verbose_name='Аватар'),
+        ),
+        migrations.AddIndex(
+            model_name='subscribe',
+            index=models.Index(fields=['author', 'user'], name='users_subsc_author__bec743_idx'),
+        ),
+    ]
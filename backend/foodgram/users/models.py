@@ -41,6 +41,9 @@ class Subscribe(models.Model):
     class Meta:
         verbose_name = 'Подписка на авторов'
         verbose_name_plural = 'Подписки на авторов'
+        indexes = [
+            models.Index(fields=['author', 'user']),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'author'],